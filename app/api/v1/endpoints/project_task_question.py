@@ -1,129 +1,122 @@
 # api/v1/endpoints/project_task_question.py
-import openai
-import asyncio
-from fastapi import APIRouter, HTTPException
+import re
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from app.schemas.project import UserInput, ProjectGoal, Answer, SubTask, TaskDetails
-from app.services.openai_service import generate_text
+from app.services.openai_service import generate_text, generate_text_with_context, create_chat_completion
 from app.utils.task_utils import extract_tasks
+from app.utils.prompt_utils import build_context, build_messages
+from app.services.project_store import ProjectStore, Task
 
 router = APIRouter()
 
 # In-memory storage for projects
-projects = {}
+store = ProjectStore()
 
 # Route to start a new project
 @router.post("/start_project/")
 async def start_project(user_input: UserInput):
     # Generate a simple project title based on the user's input
-    project_id = len(projects)
     user_message = user_input.user_message
     
-    response = await generate_text(f"Make a simple project title like the message in one line: {user_message}. No need to change the line. Chack only grammar. Do not include any additional text. Only provide the project title.")
-    projects[project_id] = {
-        "goal": response,
-        "tasks": [],
-        "answered_questions": [],
-    }
+    response = await generate_text(f"Make a simple project title like the message in one line: {user_message}. No need to change the line. Chack only grammar. Do not include any additional text. Only provide the project title.", temperature=0)
+    project_id = store.add(response)
     return {"project_id": project_id, "project_goal": response}
 
 # Route to add a task to a project
 @router.post("/add_task/{project_id}/")
 async def add_task(project_id: int, project_goal: ProjectGoal):
     # Check if the project exists
-    if project_id not in projects:
+    if project_id not in store:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    project = projects[project_id]
+    project_tasks = store.tasks[project_id]
     
     # Extract tasks from the task paragraph using OpenAI
-    tasks = await extract_tasks(project_goal.add_task)
+    tasks = extract_tasks(project_goal.add_task)
     
     # Track the existing task descriptions to avoid duplication
-    existing_task_descriptions = [task["task"] for task in project["tasks"]]
+    existing_task_descriptions = [task.task for task in project_tasks]
     
     # Add each task to the project under the goal with sequential numbering
     for i, task in enumerate(tasks, start=1):
-        task_description = f"{task.strip()} for project goal: {project['goal']}"
+        task_description = f"{task.strip()} for project goal: {store.goals[project_id]}"
         
         # Only add the task if it doesn't already exist
         if task_description not in existing_task_descriptions:
-            project["tasks"].append({
-                "task": task_description,
-                "subtasks": [],
-            })
+            project_tasks.append(Task(task=task_description))
         else:
             # If the task already exists, we skip it to avoid duplication
             continue
 
-    return {"project_id": project_id, "tasks": project["tasks"]}
+    store.touch(project_id)
+    return {"project_id": project_id, "tasks": project_tasks}
 
 
 # Route to add details to a task
 @router.post("/add_task_details/{project_id}/{task_index}/")
 async def add_task_details(project_id: int, task_index: int, task_details: TaskDetails):
-    if project_id not in projects:
+    if project_id not in store:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    project = projects[project_id]
-    if task_index >= len(project["tasks"]):
+    project_tasks = store.tasks[project_id]
+    if task_index >= len(project_tasks):
         raise HTTPException(status_code=404, detail="Task not found")
 
     # Add the task details to the selected task
-    project["tasks"][task_index]["details"] = task_details.details
+    project_tasks[task_index].details = task_details.details
+    store.touch(project_id)
     
-    return {"project_id": project_id, "tasks": project["tasks"]}
+    return {"project_id": project_id, "tasks": project_tasks}
 
 # Route to add a subtask to a task
 @router.post("/add_subtask/{project_id}/{task_index}/")
 async def add_subtask(project_id: int, task_index: int, subtask: SubTask):
-    if project_id not in projects:
+    if project_id not in store:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    project = projects[project_id]
-    if task_index >= len(project["tasks"]):
+    project_tasks = store.tasks[project_id]
+    if task_index >= len(project_tasks):
         raise HTTPException(status_code=404, detail="Task not found")
 
     # Add the subtask to the task's subtask list
-    project["tasks"][task_index]["subtasks"].append(subtask.subtask)
+    project_tasks[task_index].subtasks.append(subtask.subtask)
+    store.touch(project_id)
     
-    return {"project_id": project_id, "tasks": project["tasks"]}
+    return {"project_id": project_id, "tasks": project_tasks}
 
 
 
 # Route to ask a question about the project goal
 @router.post("/ask/{project_id}/")
 async def ask_question(project_id: int):
-    if project_id not in projects:
+    if project_id not in store:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    project = projects[project_id]
-    
-    # Check if no question has been asked yet
-    if not project.get("answered_questions"):
-        # Generate the first question for the project goal
-        question = await generate_text(f"Based on this project goal, what is the first question to ask: {project['goal']}")
-        project["answered_questions"] = [{"question": question, "answer": None}]
-    else:
-        # If there are questions, get the next question based on the previous answers
-        question = await generate_text(f"Based on the previous questions, what is the next question to ask: {project['goal']}")
-        project["answered_questions"].append({"question": question, "answer": None})
+    # Generate the next question (or the first one) from the goal, tasks and previous answers
+    context = build_context(store.goals[project_id], store.tasks[project_id], store.history(project_id))
+    messages = build_messages(context)
+    question = await create_chat_completion(messages, max_tokens=150, temperature=0, user=str(project_id))
+    store.add_question(project_id, question)
+    store.touch(project_id)
     
     return {"question": question}
 
 # Route to answer a question for the project
 @router.post("/answer_question/{project_id}/")
 async def answer_question(project_id: int, answer: Answer):
-    if project_id not in projects:
+    if project_id not in store:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    project = projects[project_id]
+    qas = store.qas[project_id]
     
     # Check if there is a question to answer
-    if not project["answered_questions"]:
+    if not qas:
         raise HTTPException(status_code=400, detail="No question to answer")
     
     # Store the answer in the most recent question
-    project["answered_questions"][-1]["answer"] = answer.answer
+    qas[-1]["answer"] = answer.answer
+    store.touch(project_id)
     
     return {"message": "Answer stored successfully"}
 
@@ -131,59 +124,45 @@ async def answer_question(project_id: int, answer: Answer):
 # New route for chat with project assistant
 @router.post("/chat/{project_id}/")
 async def chat_with_project_assistant(project_id: int, user_message: str):
-    if project_id not in projects:
+    if project_id not in store:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    project = projects[project_id]
-    
-    # Gather all the information about the project
-    project_goal = project["goal"]
-    tasks = project["tasks"]
-    answered_questions = project.get("answered_questions", [])
-    
     # Format project context for OpenAI
-    context = f"Project Goal: {project_goal}\n\n"
-    
-    context += "Tasks:\n"
-    for task in tasks:
-        context += f"- {task['task']}\n"
-        for subtask in task['subtasks']:
-            context += f"  - Subtask: {subtask}\n"
-        if 'details' in task and task['details']:
-            context += f"  - Details: {task['details']}\n"
-    
-    context += "\nAnswered Questions:\n"
-    for q_a in answered_questions:
-        context += f"Q: {q_a['question']}\n"
-        context += f"A: {q_a['answer']}\n"
+    context = build_context(store.goals[project_id], store.tasks[project_id], store.history(project_id))
+    messages = build_messages(context, user_message)
 
-    # Add user's message to the context
-    context += f"\nUser's message: {user_message}\n\nAssistant, based on this information, answer the user's query."
+    # Stream the response from OpenAI to the client as it is generated
+    chunks = await generate_text_with_context(messages, context, user_message, user=str(project_id))
 
-    # Get response from OpenAI with the context
-    response = await generate_text_with_context(context)
+    # Keep proxies from caching or buffering the event stream
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(_to_sse(chunks), media_type="text/event-stream", headers=headers)
 
-    return {"project_id": project_id, "response": response}
+# SSE treats CRLF, a lone CR and a lone LF all as line breaks
+_SSE_LINE_BREAK = re.compile(r"\r\n|\r|\n")
 
-# Function to get OpenAI response with context
-async def generate_text_with_context(context: str):
+# Wrap text chunks as server-sent events; a chunk spanning lines becomes one multi-line event.
+# The status line has already been sent when a chunk fails, so a failure mid-stream is
+# reported to the client as a final "error" event
+async def _to_sse(chunks):
     try:
-        response = await asyncio.to_thread(openai.ChatCompletion.create,
-                                            model="gpt-3.5-turbo",  # You can change this to "gpt-4" or any model you prefer
-                                            messages=[
-                                                {"role": "system", "content": "You are a helpful assistant named OLLIE that helps users with project details."},
-                                                {"role": "user", "content": context}
-                                            ],
-                                            max_tokens=300,
-                                            temperature=0.7,
-        )
-        return response['choices'][0]['message']['content'].strip()
+        async for text in chunks:
+            yield "".join(f"data: {line}\n" for line in _SSE_LINE_BREAK.split(text)) + "\n"
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
+        message = " ".join(_SSE_LINE_BREAK.split(f"Error generating response: {str(e)}"))
+        yield f"event: error\ndata: {message}\n\n"
 
 # Route to get project details
 @router.get("/get_project/{project_id}/")
-async def get_project(project_id: int):
-    if project_id not in projects:
+async def get_project(project_id: int, request: Request):
+    if project_id not in store:
         raise HTTPException(status_code=404, detail="Project not found")
-    return projects[project_id]
+
+    # Skip rebuilding and sending the project if the client already has this version
+    etag = store.etag(project_id)
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    # orjson encodes the Task dataclasses directly, skipping FastAPI's jsonable_encoder pass
+    return ORJSONResponse(store.to_dict(project_id), headers={"ETag": etag})
@@ -8,3 +8,15 @@ load_dotenv()
 
 # OpenAI API Key
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Maximum number of OpenAI requests (chat and embeddings) in flight at once; size it to the account's rate limit
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+
+# Optional file the semantic response cache is loaded from and saved to
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH")
+
+# Bounds for the semantic response cache: project contexts kept, answers kept per context,
+# and how long (seconds) a context's answers live
+SEMANTIC_CACHE_MAX_SCOPES = int(os.getenv("SEMANTIC_CACHE_MAX_SCOPES", "128"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "32"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
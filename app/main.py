@@ -1,9 +1,39 @@
 # main.py
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from app.config import SEMANTIC_CACHE_PATH
+from app.services import semantic_cache
+from app.services.openai_service import open_client, close_client
 from app.api.v1.endpoints import project_task_question  # Import the consolidated file
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The OpenAI client keeps one pooled connection set while the app runs;
+    # it is created on startup and released on shutdown
+    open_client()
+    if SEMANTIC_CACHE_PATH:
+        semantic_cache.load(SEMANTIC_CACHE_PATH)
+    yield
+    await close_client()
+    if SEMANTIC_CACHE_PATH:
+        semantic_cache.save(SEMANTIC_CACHE_PATH)
+
+
+# Serialize every JSON response with orjson instead of the stdlib json module
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Fail at import if two routes claim the same path and method, instead of one silently shadowing the other
+def _assert_unique_routes(app: FastAPI):
+    registered = set()
+    for route in app.routes:
+        for method in getattr(route, "methods", None) or ():
+            if (route.path, method) in registered:
+                raise RuntimeError(f"Duplicate route registered: {method} {route.path}")
+            registered.add((route.path, method))
 
 # Include the router for project, task, and question endpoints
 app.include_router(project_task_question.router, prefix="/projects", tags=["projects"])
@@ -11,3 +41,5 @@ app.include_router(project_task_question.router, prefix="/projects", tags=["proj
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to Go Get A Genie! Start your project."}
+
+_assert_unique_routes(app)
@@ -0,0 +1,23 @@
+# services/llm_cache.py
+
+import asyncio
+import hashlib
+import json
+from cachetools import TTLCache
+
+# Completions keyed by a hash of the full request, kept for an hour
+_cache = TTLCache(maxsize=10_000, ttl=3600)
+_lock = asyncio.Lock()
+
+# Build a stable cache key from everything that shapes the completion
+def make_key(model: str, messages: list, max_tokens: int, temperature: float) -> str:
+    payload = json.dumps([model, messages, max_tokens, temperature], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+async def get_cached(key: str):
+    async with _lock:
+        return _cache.get(key)
+
+async def set_cached(key: str, value: str):
+    async with _lock:
+        _cache[key] = value
@@ -1,26 +1,194 @@
 # services/openai_service.py
 
-import openai
-from fastapi import HTTPException
-from app.config import OPENAI_API_KEY
 import asyncio
+import weakref
+import httpx
+import numpy as np
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, APIConnectionError, InternalServerError, RateLimitError
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+from fastapi import HTTPException
+from app.config import OPENAI_API_KEY, OPENAI_MAX_CONCURRENCY
+from app.services.llm_cache import make_key, get_cached, set_cached
+from app.services import semantic_cache
+
+# One async client per application run, holding a single pooled httpx connection set.
+# Set by open_client() on startup and released by close_client() on shutdown
+_client = None
+
+# Requests beyond the limit queue here instead of bouncing off the API with 429s
+_llm_sem = None
+
+MODEL = "gpt-3.5-turbo"  # You can change this to "gpt-4" if needed
+EMBEDDING_MODEL = "text-embedding-3-small"
+# The embedding only feeds the best-effort semantic cache, so it gets one short attempt
+EMBEDDING_TIMEOUT = 2.0
+
+# Create the shared client on application startup
+def open_client():
+    global _client, _llm_sem
+    _client = AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        http_client=DefaultAsyncHttpxClient(limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)),
+        # Retries are handled by _call_with_retry, outside the concurrency limit
+        max_retries=0,
+    )
+    # Created with the client so it belongs to the event loop the app runs on
+    _llm_sem = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+# Close the shared client's connections on application shutdown
+async def close_client():
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.close()
 
-# Set OpenAI API key
-openai.api_key = OPENAI_API_KEY
+# Back off on rate limits and transient errors
+def _retrying():
+    return AsyncRetrying(
+        wait=wait_exponential_jitter(initial=1, max=8),
+        retry=retry_if_exception_type((RateLimitError, APIConnectionError, InternalServerError)),
+        stop=stop_after_attempt(4),
+        reraise=True,
+    )
+
+# Call an OpenAI API method under the concurrency limit with retries.
+# The slot is only held per attempt, so waiting retries don't block the queue
+async def _call_with_retry(create, **kwargs):
+    async for attempt in _retrying():
+        with attempt:
+            async with _llm_sem:
+                return await create(**kwargs)
+
+# Open a streaming chat completion with retries, returning the stream together with a
+# function that frees its concurrency slot. Tokens are generated while the stream is
+# read, so the slot stays taken until the caller is done with it
+async def _open_stream_with_retry(**kwargs):
+    sem = _llm_sem
+    async for attempt in _retrying():
+        with attempt:
+            await sem.acquire()
+            try:
+                stream = await _client.chat.completions.create(stream=True, **kwargs)
+            except BaseException:
+                sem.release()
+                raise
+
+    released = False
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            sem.release()
+    return stream, release
+
+# Run a chat completion, serving repeat deterministic (temperature 0) prompts from the cache
+async def create_chat_completion(messages: list, max_tokens: int, temperature: float, user: str = None):
+    key = make_key(MODEL, messages, max_tokens, temperature) if temperature == 0 else None
+    if key is not None:
+        cached = await get_cached(key)
+        if cached is not None:
+            return cached
+
+    try:
+        response = await _call_with_retry(
+            _client.chat.completions.create,
+            model=MODEL,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            # A stable per-project user id keeps requests routed to the same prompt cache
+            **({"user": user} if user else {}),
+        )
+        result = response.choices[0].message.content.strip()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
+
+    if key is not None:
+        await set_cached(key, result)
+    return result
 
 # Function to generate text using OpenAI API
-async def generate_text(context: str):
+async def generate_text(context: str, temperature: float = 0.7):
+    return await create_chat_completion(
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": context}
+        ],
+        max_tokens=150,
+        temperature=temperature,
+    )
+
+# Embed text as a unit-length vector, so dot products are cosine similarities.
+# A single attempt with a short timeout; callers skip the cache if it fails
+async def embed(text: str):
+    async with _llm_sem:
+        response = await _client.with_options(timeout=EMBEDDING_TIMEOUT).embeddings.create(model=EMBEDDING_MODEL, input=text)
+    vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+async def _yield_once(text: str):
+    yield text
+
+# Function to stream the OpenAI response for prebuilt project messages, reusing answers
+# to identical or near-duplicate user messages asked against the same project context
+# (the text build_context rendered for the messages).
+# Returns an async iterator of text chunks; errors starting the request raise here,
+# before any chunk is sent
+async def generate_text_with_context(messages: list, context: str, user_message: str, user: str = None):
+    # Temperature 0 so the stored answer is the one the model would give again.
+    # Exact repeats are answered without paying for an embedding round trip
+    key = make_key(MODEL, messages, 300, 0)
+    cached = await get_cached(key)
+    if cached is not None:
+        return _yield_once(cached)
+
+    # Vectors from different embedding models are not comparable, so they never share a scope
+    scope = semantic_cache.make_scope(MODEL, EMBEDDING_MODEL, messages[0]["content"], context)
     try:
-        # Use asyncio.to_thread to run the blocking OpenAI API call in a separate thread
-        response = await asyncio.to_thread(openai.ChatCompletion.create,
-                                            model="gpt-3.5-turbo",  # You can change this to "gpt-4" if needed
-                                            messages=[
-                                                {"role": "system", "content": "You are a helpful assistant."},
-                                                {"role": "user", "content": context}
-                                            ],
-                                            max_tokens=150,
-                                            temperature=0.7,
+        vector = await embed(user_message)
+    except Exception:
+        # The semantic cache is best effort; answer without it if embedding fails
+        vector = None
+
+    if vector is not None:
+        cached = await semantic_cache.lookup(scope, vector)
+        if cached is not None:
+            return _yield_once(cached)
+
+    try:
+        stream, release = await _open_stream_with_retry(
+            model=MODEL,
+            messages=messages,
+            max_tokens=300,
+            temperature=0,
+            **({"user": user} if user else {}),
         )
-        return response['choices'][0]['message']['content'].strip()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
+
+    async def chunks():
+        parts = []
+        try:
+            async for chunk in stream:
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if text:
+                    parts.append(text)
+                    yield text
+        finally:
+            try:
+                await stream.close()
+            finally:
+                release()
+
+        # Only a fully received response is cached; an upstream failure above
+        # propagates to the caller before reaching this point
+        response = "".join(parts).strip()
+        await set_cached(key, response)
+        if vector is not None:
+            await semantic_cache.store(scope, vector, response)
+
+    iterator = chunks()
+    # If the response is dropped before reading starts, the finally above never runs;
+    # free the slot when the iterator is collected instead
+    weakref.finalize(iterator, release)
+    return iterator
@@ -0,0 +1,63 @@
+# services/project_store.py
+
+import uuid
+from dataclasses import dataclass, field
+from app.utils.prompt_utils import render_qa
+
+@dataclass(slots=True)
+class Task:
+    task: str
+    subtasks: list[str] = field(default_factory=list)
+    details: str | None = None
+
+# In-memory projects stored column-wise, indexed by integer project id
+@dataclass(slots=True)
+class ProjectStore:
+    goals: list[str] = field(default_factory=list)
+    tasks: list[list[Task]] = field(default_factory=list)
+    qas: list[list[dict]] = field(default_factory=list)
+    # Rendered Q&A history for all but the latest question, which can still be answered.
+    # Earlier entries never change, so the text only ever grows by appending
+    qa_texts: list[str] = field(default_factory=list)
+    # Bumped on every change to a project, for conditional GETs
+    versions: list[int] = field(default_factory=list)
+    # Distinguishes ETags across restarts, when ids and versions start over
+    instance: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+
+    def __contains__(self, project_id: int) -> bool:
+        return 0 <= project_id < len(self.goals)
+
+    # Add a new project and return its id
+    def add(self, goal: str) -> int:
+        self.goals.append(goal)
+        self.tasks.append([])
+        self.qas.append([])
+        self.qa_texts.append("")
+        self.versions.append(0)
+        return len(self.goals) - 1
+
+    def add_question(self, project_id: int, question: str):
+        qas = self.qas[project_id]
+        if qas:
+            # The previous question can no longer be answered; freeze its rendering
+            self.qa_texts[project_id] += render_qa(qas[-1])
+        qas.append({"question": question, "answer": None})
+
+    # Rendered Q&A history, reusing the memoized text and rendering only the latest entry
+    def history(self, project_id: int) -> str:
+        qas = self.qas[project_id]
+        return self.qa_texts[project_id] + render_qa(qas[-1]) if qas else ""
+
+    # Record that a project changed, invalidating its current ETag
+    def touch(self, project_id: int):
+        self.versions[project_id] += 1
+
+    def etag(self, project_id: int) -> str:
+        return f'"{self.instance}-{project_id}-{self.versions[project_id]}"'
+
+    def to_dict(self, project_id: int) -> dict:
+        return {
+            "goal": self.goals[project_id],
+            "tasks": self.tasks[project_id],
+            "answered_questions": self.qas[project_id],
+        }
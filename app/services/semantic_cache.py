@@ -0,0 +1,68 @@
+# services/semantic_cache.py
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+from cachetools import TTLCache
+from app.config import SEMANTIC_CACHE_MAX_SCOPES, SEMANTIC_CACHE_MAX_ENTRIES, SEMANTIC_CACHE_TTL
+
+# Minimum cosine similarity for a stored answer to be reused
+SIMILARITY_THRESHOLD = 0.95
+MAX_ENTRIES_PER_SCOPE = SEMANTIC_CACHE_MAX_ENTRIES
+
+# Stored (normalized embedding matrix, responses) per scope. A scope is a hash of the
+# project context a message was asked against, so near-duplicate messages only match
+# answers given for the same project state. Scopes expire like the exact-match cache
+_scopes = TTLCache(maxsize=SEMANTIC_CACHE_MAX_SCOPES, ttl=SEMANTIC_CACHE_TTL)
+_lock = asyncio.Lock()
+
+# Build the scope key from the prompt text that precedes the user's message
+def make_scope(*parts: str) -> str:
+    return hashlib.sha256("\x00".join(parts).encode()).hexdigest()
+
+# Return the stored response closest to the vector if it is similar enough
+async def lookup(scope: str, vector: np.ndarray):
+    async with _lock:
+        entry = _scopes.get(scope)
+    if entry is None:
+        return None
+    vectors, responses = entry
+    scores = vectors @ vector
+    best = int(np.argmax(scores))
+    return responses[best] if scores[best] >= SIMILARITY_THRESHOLD else None
+
+async def store(scope: str, vector: np.ndarray, response: str):
+    async with _lock:
+        vectors, responses = _scopes.get(scope, (np.empty((0, vector.shape[0]), dtype=np.float32), []))
+        # Keep only the most recent entries for the scope
+        vectors = np.vstack([vectors, vector])[-MAX_ENTRIES_PER_SCOPE:]
+        responses = (responses + [response])[-MAX_ENTRIES_PER_SCOPE:]
+        _scopes[scope] = (vectors, responses)
+
+# Persist the cache to disk so it survives restarts. Vectors go in as plain arrays and
+# scopes/responses as JSON, so loading never unpickles anything. The file is written
+# next to the target and moved into place, so an interrupted save never leaves a partial file
+def save(path: str):
+    items = list(_scopes.items())
+    index = json.dumps([[scope, responses] for scope, (_, responses) in items])
+    vectors = {f"vectors_{i}": entry_vectors for i, (_, (entry_vectors, _)) in enumerate(items)}
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, index=np.array(index), **vectors)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def load(path: str):
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            for i, (scope, responses) in enumerate(json.loads(str(data["index"]))):
+                _scopes[scope] = (data[f"vectors_{i}"][-MAX_ENTRIES_PER_SCOPE:], responses[-MAX_ENTRIES_PER_SCOPE:])
+    except Exception:
+        # A missing or unreadable cache file just means starting with an empty cache
+        _scopes.clear()
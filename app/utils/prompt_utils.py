@@ -0,0 +1,43 @@
+# utils/prompt_utils.py
+
+from functools import lru_cache
+
+# Stable instructions shared by every project prompt. They come first and never
+# change, so successive calls share a long identical prefix the provider can cache
+STABLE_SYSTEM = (
+    "You are a helpful assistant named OLLIE that helps users with project details.\n"
+    "You are given the project GOAL, its TASKS and the HISTORY of questions asked with the user's answers, followed by a TASK.\n"
+    "If the TASK is to ask the next question, reply with one short question that moves the project forward "
+    "and has not been asked before. Do not include any additional text.\n"
+    "Otherwise, answer the user's message based on the project information."
+)
+
+NEXT_QUESTION_TASK = "Ask the next question."
+
+# Render one task with its subtasks and details; tasks repeat across requests, so memoize
+@lru_cache(maxsize=1024)
+def _render_task(task: str, subtasks: tuple, details: str = None):
+    parts = [f"- {task.strip()}\n"]
+    parts.extend(f"  - Subtask: {subtask.strip()}\n" for subtask in subtasks)
+    if details:
+        parts.append(f"  - Details: {details.strip()}\n")
+    return "".join(parts)
+
+def render_qa(q_a: dict):
+    answer = q_a['answer'].strip() if q_a['answer'] else "(no answer yet)"
+    return f"Q: {q_a['question'].strip()}\nA: {answer}\n"
+
+# Render the project context (goal, tasks and Q&A history) that precedes the TASK
+def build_context(goal: str, tasks: list, history: str):
+    parts = ["GOAL:\n", goal.strip(), "\n\nTASKS:\n"]
+    parts.extend(_render_task(task.task, tuple(task.subtasks), task.details) for task in tasks)
+    parts.extend(("\nHISTORY:\n", history))
+    return "".join(parts)
+
+# Build the chat messages for a project, stable content first and variable content last
+def build_messages(context: str, user_msg: str = None):
+    task = f"User's message: {user_msg.strip()}" if user_msg else NEXT_QUESTION_TASK
+    return [
+        {"role": "system", "content": STABLE_SYSTEM},
+        {"role": "user", "content": f"{context}\nTASK:\n{task}"},
+    ]
@@ -3,14 +3,12 @@
 import re
 from fastapi import HTTPException
 
-async def extract_tasks(task_paragraph: str):
+# Split after a period when the next sentence starts with a capital letter
+_TASK_SPLIT = re.compile(r'(?<=\.)\s*(?=[A-Z])')
+
+def extract_tasks(task_paragraph: str) -> list[str]:
     try:
-        # Use regex to split tasks based on common delimiters (e.g., period, exclamation mark, newline)
-        task_list = re.split(r'(?<=\.)\s*(?=[A-Z])', task_paragraph)
-        
-        # Clean up each task to remove any unwanted extra spaces or special characters
-        tasks = [task.strip() for task in task_list if task.strip()]
-        
-        return tasks
+        # Split the paragraph into tasks and drop any empty pieces after trimming whitespace
+        return [task for task in (piece.strip() for piece in _TASK_SPLIT.split(task_paragraph)) if task]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error extracting tasks: {str(e)}")
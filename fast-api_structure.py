@@ -3,6 +3,7 @@ from pathlib import Path
 import logging
 
 logging.basicConfig(level=logging.INFO,format='[%(asctime)s]: %(message)s:')
+logger = logging.getLogger(__name__)
 
 project_name = "app"
 
@@ -32,11 +33,11 @@ for filepath in list_of_files:
 
     if dir != "":
         os.makedirs(dir,exist_ok=True)
-        logging.info(f"Directory{dir} created for file{file} successfully")
+        logger.info("Directory %s created for file %s successfully", dir, file)
 
     if (not os.path.exists(filepath)) or (os.path.getsize(filepath)==0):
         with open(filepath, "w") as f:
-            logging.info(f"Creating files: {filepath} successfully")
+            logger.info("Creating files: %s successfully", filepath)
     else:
-        logging.info("Files{file} already exists")
+        logger.info("Files %s already exists", filepath)
  
\ No newline at end of file